@@ -0,0 +1,167 @@
+"""Архівація видалених записів: перенесення з records у records_archive.
+
+    python archive.py [--once] [--retention-days 30] [--batch-size 500]
+
+Неактивні записи, видалені раніше за --retention-days, переносяться невеликими
+пакетами: кожен пакет - окрема коротка транзакція (INSERT ... SELECT в архів і
+DELETE за первинним ключем), тож блокування тримаються мілісекунди. Пакети йдуть
+за ключем (updated_at, id) по індексу ix_records_active_updated, без повторного
+перегляду вже обробленого діапазону. Між пакетами - пауза, а з REPLICA_DATABASE_URLS
+архівація чекає, поки відставання реплік не опуститься нижче --max-replica-lag.
+
+Без --once працює постійно: прохід кожні --interval секунд, метрики на --metrics-port.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+from sqlalchemy import and_, delete, func, insert, literal, or_, select, text
+from sqlalchemy.exc import DBAPIError
+
+from app import DB_CONNECT_MAX_DELAY, Record, RecordArchive, engine, replica_router
+from startup import wait_for_database
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_COLUMNS = ["id", "title", "record_type", "description", "created_by", "created_at", "updated_at"]
+
+# Власний реєстр: процес архівації не віддає метрики HTTP сервісу, імпортовані разом з app
+registry = CollectorRegistry()
+rows_moved = Counter("auth_archive_rows_moved_total", "Записи, перенесені в records_archive", registry=registry)
+batches = Counter("auth_archive_batches_total", "Пакети архівації", ["result"], registry=registry)
+batch_duration = Histogram("auth_archive_batch_duration_seconds", "Тривалість транзакції одного пакета архівації", registry=registry)
+throttled_seconds = Counter("auth_archive_throttled_seconds_total", "Час очікування через відставання реплік", registry=registry)
+backlog_rows = Gauge("auth_archive_backlog_rows", "Записи, що вже мають бути в архіві, але ще в records", registry=registry)
+archive_lag = Gauge("auth_archive_lag_seconds", "Наскільки найстаріший неперенесений запис старший за термін зберігання", registry=registry)
+last_run = Gauge("auth_archive_last_run_timestamp_seconds", "Час завершення останнього проходу архівації (до першого - час старту)", registry=registry)
+
+
+def eligible(cutoff: datetime):
+    return and_(Record.is_active == False, Record.updated_at < cutoff)
+
+
+async def measure_backlog(cutoff: datetime):
+    """Оновлює метрики відставання: кількість записів до архівації і вік найстарішого"""
+    async with engine.connect() as conn:
+        count, oldest = (await conn.execute(select(func.count(), func.min(Record.updated_at)).where(eligible(cutoff)))).one()
+    backlog_rows.set(count)
+    archive_lag.set((cutoff - oldest).total_seconds() if oldest else 0)
+    return count
+
+
+async def wait_for_replicas(max_lag: float, pause: float):
+    """Не продовжує, поки доступні репліки відстають більше ніж на max_lag секунд"""
+    if replica_router is None:
+        return
+    while True:
+        await asyncio.gather(*(replica_router.check(replica) for replica in replica_router.replicas))
+        lag = max((replica.lag for replica in replica_router.replicas if replica.lag is not None), default=0.0)
+        if lag <= max_lag:
+            return
+        logger.info(f"Відставання реплік {lag:.0f} с, архівація чекає")
+        await asyncio.sleep(pause)
+        throttled_seconds.inc(pause)
+
+
+async def archive_batch(cutoff: datetime, after, batch_size: int, lock_wait_timeout: int):
+    """Переносить до batch_size записів після ключа `after` = (updated_at, id).
+    Повертає (кількість перенесених, ключ останнього переглянутого запису або None)"""
+    query = select(Record.id, Record.updated_at).where(eligible(cutoff))
+    if after is not None:
+        updated_at, record_id = after
+        query = query.where(or_(Record.updated_at > updated_at, and_(Record.updated_at == updated_at, Record.id > record_id)))
+    query = query.order_by(Record.updated_at, Record.id).limit(batch_size)
+
+    async with engine.begin() as conn:
+        if conn.dialect.name == "mysql":
+            # Пакет не повинен довго чекати на блокування запитів сервісу
+            await conn.execute(text(f"SET SESSION innodb_lock_wait_timeout = {lock_wait_timeout}"))
+        rows = (await conn.execute(query)).all()
+        if not rows:
+            return 0, None
+        ids = [row.id for row in rows]
+        # Повторна умова is_active під блокуванням INSERT ... SELECT: переносимо лише те, що видаляємо
+        await conn.execute(insert(RecordArchive).from_select(
+            [*ARCHIVED_COLUMNS, "archived_at"],
+            select(*(getattr(Record, column) for column in ARCHIVED_COLUMNS), literal(datetime.utcnow()))
+            .where(Record.id.in_(ids), Record.is_active == False),
+        ))
+        result = await conn.execute(delete(Record).where(Record.id.in_(ids), Record.is_active == False))
+    return result.rowcount, (rows[-1].updated_at, rows[-1].id)
+
+
+async def archive_pass(args) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=args.retention_days)
+    backlog = await measure_backlog(cutoff)
+    moved_total, after = 0, None
+    if backlog:
+        logger.info(f"До архівації {backlog} записів, видалених до {cutoff:%Y-%m-%d %H:%M}")
+
+    while True:
+        await wait_for_replicas(args.max_replica_lag, args.pause)
+        started = time.perf_counter()
+        try:
+            moved, after = await archive_batch(cutoff, after, args.batch_size, args.lock_wait_timeout)
+        except DBAPIError as e:
+            # Наприклад, lock wait timeout: решту підхопить наступний прохід
+            batches.labels(result="error").inc()
+            logger.error(f"Пакет архівації не виконано: {e}")
+            break
+        batch_duration.observe(time.perf_counter() - started)
+        if after is None:
+            break
+        batches.labels(result="ok").inc()
+        rows_moved.inc(moved)
+        moved_total += moved
+        backlog_rows.set(max(backlog - moved_total, 0))
+        await asyncio.sleep(args.pause)
+
+    await measure_backlog(cutoff)
+    last_run.set(time.time())
+    logger.info(f"Прохід архівації завершено: перенесено {moved_total} записів")
+    return moved_total
+
+
+async def main(args):
+    # Відлік для RecordsArchivalStalled: до завершення першого проходу - від старту, а не від 1970 року
+    last_run.set(time.time())
+    try:
+        await wait_for_database(engine, max_delay=DB_CONNECT_MAX_DELAY)
+        while True:
+            await archive_pass(args)
+            if args.once:
+                return
+            await asyncio.sleep(args.interval)
+    finally:
+        await engine.dispose()
+        if replica_router is not None:
+            await replica_router.dispose()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Архівація видалених записів auth-service")
+    parser.add_argument("--once", action="store_true", help="Один прохід і вихід (для cron)")
+    parser.add_argument("--retention-days", type=float, default=float(os.getenv("ARCHIVE_RETENTION_DAYS", "30")),
+                        help="Скільки днів видалений запис лишається в records")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("ARCHIVE_BATCH_SIZE", "500")), help="Записів в одній транзакції")
+    parser.add_argument("--pause", type=float, default=float(os.getenv("ARCHIVE_BATCH_PAUSE", "0.2")), help="Пауза між пакетами (секунди)")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("ARCHIVE_INTERVAL", "300")), help="Пауза між проходами (секунди)")
+    parser.add_argument("--max-replica-lag", type=float, default=float(os.getenv("ARCHIVE_MAX_REPLICA_LAG", "2")),
+                        help="Чекати, поки відставання реплік більше цього значення (секунди)")
+    parser.add_argument("--lock-wait-timeout", type=int, default=int(os.getenv("ARCHIVE_LOCK_WAIT_TIMEOUT", "2")),
+                        help="innodb_lock_wait_timeout сесії архівації (секунди)")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("ARCHIVE_METRICS_PORT", "9106")),
+                        help="Порт /metrics у постійному режимі")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("ARCHIVE_LOG_LEVEL", "INFO"))
+    args = parse_args()
+    if not args.once:
+        start_http_server(args.metrics_port, registry=registry)
+    asyncio.run(main(args))
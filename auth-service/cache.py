@@ -0,0 +1,206 @@
+"""Кеші auth-service"""
+from collections import OrderedDict
+import json
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """LRU кеш перевірених JWT токенів з TTL.
+
+    Ключ - сирий токен, значення - словник principal (username, прапорці користувача).
+    Запис живе не довше за `exp` токена і не довше за `ttl` секунд.
+    `on_evict(reason)` викликається для кожного витісненого запису
+    (reason: expired, capacity, deactivated).
+    """
+
+    def __init__(self, max_size: int, ttl: float, on_evict=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.on_evict = on_evict or (lambda reason: None)
+        self._entries = OrderedDict()  # token -> (expires_at, principal)
+        self._tokens_by_user = {}  # username -> set(token)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token: str):
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at <= time.time():
+            self._remove(token, "expired")
+            return None
+        self._entries.move_to_end(token)
+        return principal
+
+    def put(self, token: str, principal: dict, exp: float):
+        if self.max_size <= 0:
+            return
+        if token in self._entries:
+            self._remove(token, None)
+        expires_at = min(exp, time.time() + self.ttl)
+        self._entries[token] = (expires_at, principal)
+        self._tokens_by_user.setdefault(principal["username"], set()).add(token)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest, "capacity")
+
+    def evict_user(self, username: str) -> int:
+        """Видаляє всі токени користувача (наприклад, після деактивації)"""
+        tokens = list(self._tokens_by_user.get(username, ()))
+        for token in tokens:
+            self._remove(token, "deactivated")
+        return len(tokens)
+
+    def _remove(self, token: str, reason):
+        _, principal = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal["username"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal["username"]]
+        if reason:
+            self.on_evict(reason)
+
+
+# Генерація для запитів без фільтра за record_type: змінюється при будь-якому записі
+ALL_TYPES = "*"
+
+
+class LocalResultBackend:
+    """Внутрішньопроцесне сховище для ResultCache: LRU з TTL, обмежене
+    кількістю записів і сумарним розміром значень (розмір JSON у байтах).
+
+    `on_evict(reason)` викликається для кожного витісненого запису
+    (reason: expired, capacity).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict or (lambda reason: None)
+        self.size_bytes = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._generations = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def generation(self, scope: str) -> int:
+        return self._generations.get(scope, 0)
+
+    async def bump(self, scopes):
+        for scope in scopes:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key, "expired")
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value, ttl: float):
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode())
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key, None)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)), "capacity")
+
+    def _remove(self, key: str, reason):
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+        if reason:
+            self.on_evict(reason)
+
+
+class RedisResultBackend:
+    """Спільне сховище для ResultCache в Redis: кеш і генерації бачать усі
+    інстанси сервісу. Обсяг пам'яті обмежує сам Redis (`maxmemory` з політикою
+    `volatile-lru`: витісняються лише результати з TTL, лічильники генерацій
+    лишаються, інакше скинута генерація могла б повернути застарілі записи).
+    """
+
+    def __init__(self, url: str, prefix: str = "auth:records:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("Для RESULT_CACHE_BACKEND=redis потрібен пакет redis (pip install redis)")
+        self._redis = redis.from_url(url)
+        self.prefix = prefix
+
+    async def generation(self, scope: str) -> int:
+        return int(await self._redis.get(f"{self.prefix}gen:{scope}") or 0)
+
+    async def bump(self, scopes):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for scope in scopes:
+                pipe.incr(f"{self.prefix}gen:{scope}")
+            await pipe.execute()
+
+    async def get(self, key: str):
+        raw = await self._redis.get(f"{self.prefix}result:{key}")
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value, ttl: float):
+        await self._redis.set(f"{self.prefix}result:{key}", json.dumps(value, ensure_ascii=False, default=str), ex=max(1, math.ceil(ttl)))
+
+
+class ResultCache:
+    """Read-through кеш результатів запитів з версіонуванням за record_type.
+
+    Ключ складається з параметрів запиту і поточної генерації його scope
+    (record_type або ALL_TYPES). Запис у record_type збільшує генерацію цього
+    типу і ALL_TYPES, тож після запису старі результати більше не знаходяться
+    і витісняються LRU/TTL. Генерацію треба збільшувати після commit: інакше
+    паралельне читання встигне закешувати старі дані під новою генерацією.
+    `on_lookup(result)` викликається на кожне звернення (hit, miss, error).
+    `ttl` у get_or_load скорочує життя окремого результату (наприклад,
+    прочитаного з репліки, яка могла ще не отримати останній запис).
+    """
+
+    def __init__(self, backend, ttl: float, on_lookup=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.on_lookup = on_lookup or (lambda result: None)
+
+    async def get_or_load(self, scope: str, params: tuple, load, ttl: float = None):
+        try:
+            generation = await self.backend.generation(scope)
+            key = json.dumps([scope, generation, *params])
+            value = await self.backend.get(key)
+        except Exception as e:
+            # Недоступне сховище не повинно ламати читання: йдемо напряму в БД
+            logger.error(f"Кеш результатів недоступний: {e}")
+            self.on_lookup("error")
+            return await load()
+        if value is not None:
+            self.on_lookup("hit")
+            return value
+
+        self.on_lookup("miss")
+        value = await load()
+        try:
+            await self.backend.set(key, value, min(self.ttl, ttl) if ttl is not None else self.ttl)
+        except Exception as e:
+            logger.error(f"Не вдалося зберегти результат у кеш: {e}")
+        return value
+
+    async def invalidate(self, record_types):
+        try:
+            await self.backend.bump({*record_types, ALL_TYPES})
+        except Exception as e:
+            logger.error(f"Не вдалося інвалідувати кеш для {sorted(record_types)}: {e}")
@@ -0,0 +1,37 @@
+"""Запуск auth-service у кількох процесах: gunicorn з uvicorn воркерами.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Кількість воркерів задає AUTH_WORKERS. Метрики воркерів пишуться у файли
+в PROMETHEUS_MULTIPROC_DIR і зводяться на /metrics будь-якого воркера.
+Схему БД готує окремий крок `python migrate.py`, воркери лише чекають на неї (/ready).
+"""
+import glob
+import os
+import shutil
+
+workers = int(os.getenv("AUTH_WORKERS", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("AUTH_BIND", "0.0.0.0:8080")
+graceful_timeout = 30
+keepalive = 5
+
+# Має бути заданий до імпорту prometheus_client у воркерах
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+os.environ["AUTH_WORKERS"] = str(workers)
+
+
+def on_starting(server):
+    # Файли попереднього запуску подвоїли б лічильники
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # live* gauge мертвого воркера більше не враховуються; лічильники і гістограми лишаються в сумі
+    multiprocess.mark_process_dead(worker.pid)
+    for path in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], f"topk_{worker.pid}.json*")):
+        os.remove(path)
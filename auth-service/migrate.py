@@ -0,0 +1,23 @@
+"""Крок розгортання auth-service: міграції схеми і користувачі за замовчуванням.
+
+    python migrate.py [--skip-default-users] [--connect-timeout 120]
+
+Запускається один раз перед стартом сервісу (у docker-compose - сервіс auth-migrate),
+тому воркери не виконують DDL при старті і піднімаються швидко.
+"""
+import argparse
+import asyncio
+
+from app import prepare_database
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Міграції БД auth-service")
+    parser.add_argument("--skip-default-users", action="store_true", help="Не створювати admin/user1/user2/developer")
+    parser.add_argument("--connect-timeout", type=float, default=120.0, help="Скільки секунд чекати на доступність БД")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(prepare_database(default_users=not args.skip_default_users, connect_timeout=args.connect_timeout))
@@ -0,0 +1,77 @@
+"""Версійовані міграції схеми auth-service.
+
+Кожна міграція - це (версія, опис, функція). Функція отримує синхронне
+з'єднання SQLAlchemy (через `AsyncConnection.run_sync`). Застосовані версії
+записуються в таблицю `schema_migrations`, тому кожна міграція виконується один раз.
+"""
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+
+def _index_exists(conn, table: str, name: str) -> bool:
+    return any(index["name"] == name for index in inspect(conn).get_indexes(table))
+
+
+def add_records_active_type_id_index(conn):
+    # Індекс під фільтр read_records (is_active, record_type) та пагінацію за id
+    if not _index_exists(conn, "records", "ix_records_active_type_id"):
+        conn.execute(text("CREATE INDEX ix_records_active_type_id ON records (is_active, record_type, id)"))
+
+
+def add_records_active_updated_index(conn):
+    # Індекс під вибірку видалених записів для архівації пакетами за (updated_at, id)
+    if not _index_exists(conn, "records", "ix_records_active_updated"):
+        conn.execute(text("CREATE INDEX ix_records_active_updated ON records (is_active, updated_at)"))
+
+
+def create_records_archive(conn):
+    # Для нових БД таблицю створює create_all за моделлю RecordArchive
+    if not inspect(conn).has_table("records_archive"):
+        conn.execute(text(
+            "CREATE TABLE records_archive ("
+            "id INTEGER NOT NULL PRIMARY KEY, "
+            "title VARCHAR(200) NOT NULL, "
+            "record_type VARCHAR(50) NOT NULL, "
+            "description VARCHAR(500), "
+            "created_by VARCHAR(50) NOT NULL, "
+            "created_at DATETIME, "
+            "updated_at DATETIME, "
+            "archived_at DATETIME NOT NULL)"
+        ))
+
+
+MIGRATIONS = [
+    (1, "records: індекс (is_active, record_type, id)", add_records_active_type_id_index),
+    (2, "records: індекс (is_active, updated_at) для архівації", add_records_active_updated_index),
+    (3, "records_archive: архів видалених записів", create_records_archive),
+]
+
+
+def pending_migrations(conn) -> list:
+    """Версії з MIGRATIONS, ще не застосовані до БД (усі, якщо міграції не запускались)"""
+    if not inspect(conn).has_table("schema_migrations"):
+        return [version for version, _, _ in MIGRATIONS]
+    applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+    return [version for version, _, _ in MIGRATIONS if version not in applied]
+
+
+def run_migrations(conn):
+    """Застосовує міграції, яких ще немає в `schema_migrations`"""
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR(200) NOT NULL, "
+        "applied_at DATETIME NOT NULL)"
+    ))
+    applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        migrate(conn)
+        conn.execute(
+            text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:version, :description, :applied_at)"),
+            {"version": version, "description": description, "applied_at": datetime.utcnow()},
+        )
+        print(f"Застосовано міграцію {version}: {description}")
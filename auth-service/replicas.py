@@ -0,0 +1,161 @@
+"""Розподіл читань між primary і репліками MySQL.
+
+Читання лише з маршрутів без запису йдуть на репліки по колу (round-robin),
+запис і читання одразу після запису - на primary. Репліка бере участь,
+поки фонова перевірка бачить її доступною і з відставанням не більше `max_lag`.
+"""
+import asyncio
+import hashlib
+import hmac
+import itertools
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class RoutingSession(Session):
+    """Сесія, прив'язана до primary, з опційною реплікою в `info["replica"]`.
+
+    Запити читання виконуються на репліці, а flush та INSERT/UPDATE/DELETE -
+    завжди на primary, навіть якщо маршрут помилково отримав сесію для читання.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is None or self._flushing or (clause is not None and getattr(clause, "is_dml", False)):
+            return super().get_bind(mapper, clause=clause, **kw)
+        return replica.sync_engine
+
+
+class Replica:
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = False  # до першої перевірки читання йдуть на primary
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "error": self.error,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+        }
+
+
+async def replication_lag(conn):
+    """Відставання репліки в секундах; None, якщо реплікація зупинена"""
+    if conn.dialect.name != "mysql":
+        await conn.execute(text("SELECT 1"))
+        return 0.0
+    # Потребує привілею REPLICATION CLIENT
+    row = (await conn.execute(text("SHOW REPLICA STATUS"))).mappings().first()
+    if row is None:
+        raise RuntimeError("Інстанс не є реплікою (SHOW REPLICA STATUS порожній)")
+    lag = row["Seconds_Behind_Source"]
+    return None if lag is None else float(lag)
+
+
+def sticky_token(key: str, until: float, secret: str) -> str:
+    """Підписаний час (epoch), до якого читання `key` йдуть на primary, для передачі клієнту"""
+    deadline = f"{until:.3f}"
+    signature = hmac.new(secret.encode(), f"{key}:{deadline}".encode(), hashlib.sha256).hexdigest()[:32]
+    return f"{deadline}.{signature}"
+
+
+def sticky_until(token: str, key: str, secret: str) -> float:
+    """Час з токена sticky_token або 0, якщо токен виданий не для `key` чи пошкоджений"""
+    deadline, _, signature = token.rpartition(".")
+    try:
+        until = float(deadline)
+    except ValueError:
+        return 0.0
+    expected = hmac.new(secret.encode(), f"{key}:{deadline}".encode(), hashlib.sha256).hexdigest()[:32]
+    return until if hmac.compare_digest(signature, expected) else 0.0
+
+
+class ReplicaRouter:
+    """Вибір репліки для читання і облік нещодавніх записів.
+
+    `note_write(key)` позначає, що `key` (користувач) щойно змінював дані:
+    протягом `sticky_seconds` його читання йдуть на primary, щоб він бачив
+    власні зміни, яких репліка ще могла не отримати. Облік локальний для процесу,
+    тому note_write повертає дедлайн (epoch), який інші процеси отримують від
+    клієнта і передають у `wrote_recently(key, until)`.
+    `on_check(replica)` викликається після кожної перевірки репліки.
+    """
+
+    def __init__(self, replicas, max_lag: float, sticky_seconds: float, on_check=None):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.on_check = on_check or (lambda replica: None)
+        self._counter = itertools.count()
+        self._recent_writes = {}  # key -> monotonic час, до якого читати з primary
+
+    def pick(self):
+        """Наступна здорова репліка по колу або None, якщо таких немає"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def note_write(self, key: str) -> float:
+        now = time.monotonic()
+        self._recent_writes[key] = now + self.sticky_seconds
+        if len(self._recent_writes) > 10000:
+            self._recent_writes = {k: until for k, until in self._recent_writes.items() if until > now}
+        return time.time() + self.sticky_seconds
+
+    def wrote_recently(self, key: str, until: float = 0.0) -> bool:
+        if until > time.time():
+            return True
+        until = self._recent_writes.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._recent_writes[key]
+            return False
+        return True
+
+    async def check(self, replica: Replica):
+        was_healthy, first_check = replica.healthy, replica.checked_at is None
+        try:
+            async with replica.engine.connect() as conn:
+                lag = await replication_lag(conn)
+            replica.lag = lag
+            if lag is None:
+                replica.healthy, replica.error = False, "Реплікація зупинена"
+            elif lag > self.max_lag:
+                replica.healthy, replica.error = False, f"Відставання {lag:.0f} с більше {self.max_lag:.0f} с"
+            else:
+                replica.healthy, replica.error = True, None
+        except Exception as e:
+            replica.healthy, replica.lag, replica.error = False, None, str(e)
+        # Логуємо лише зміну стану, а не кожну перевірку
+        if replica.healthy != was_healthy or (first_check and not replica.healthy):
+            if replica.healthy:
+                logger.warning(f"Репліка {replica.name} приймає читання")
+            else:
+                logger.warning(f"Репліка {replica.name} виключена з читань: {replica.error}")
+        replica.checked_at = datetime.utcnow()
+        self.on_check(replica)
+
+    async def run(self, interval: float):
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(interval)
+
+    def status(self) -> list:
+        return [replica.status() for replica in self.replicas]
+
+    async def dispose(self):
+        await asyncio.gather(*(replica.engine.dispose() for replica in self.replicas))
@@ -0,0 +1,257 @@
+"""Масове наповнення БД користувачами і записами для бенчмарків.
+
+    python seed.py --users 10000 --records 1000000
+
+Дані генеруються детерміновано (за --seed), вставляються multi-row INSERT
+пакетами по --batch-size рядків. Кожен пакет комітиться разом з позначкою прогресу
+в таблиці `seed_progress`, тому повторний запуск продовжує з місця зупинки,
+а запуск з тими самими параметрами нічого не додає. Часова шкала записів (start, end
+з розгорнутим `now` і загальна кількість) фіксується при першому запуску, тож
+продовжений прогін дає ті самі created_at, що й безперервний.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from app import Record, User, create_tables, engine, get_password_hash
+
+DEFAULT_RECORD_TYPES = "user=2,product=3,order=5,report=1,config=1"
+
+
+def parse_weights(value: str) -> dict:
+    """'order=5,user=2' -> {'order': 5.0, 'user': 2.0}"""
+    weights = {}
+    for item in value.split(","):
+        name, _, weight = item.strip().partition("=")
+        if not name or not 0 < len(name) <= 50:
+            raise ValueError(f"Невалідний record_type: {item!r}")
+        weights[name] = float(weight or 1)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError("Потрібен хоча б один record_type з додатною вагою")
+    return weights
+
+
+def parse_time(value: str) -> datetime:
+    return datetime.utcnow() if value == "now" else datetime.fromisoformat(value)
+
+
+def zipf_rank(rng: random.Random, n: int, s: float) -> int:
+    """Ранг 0..n-1 з приблизно Zipf(s) розподілом (обернена функція неперервної апроксимації)"""
+    u = rng.random()
+    if s == 1.0:
+        x = (n + 1) ** u
+    else:
+        exponent = 1.0 - s
+        x = (1.0 + u * ((n + 1) ** exponent - 1.0)) ** (1.0 / exponent)
+    return min(int(x) - 1, n - 1)
+
+
+class Timeline:
+    """Час створення i-го запису: монотонно зростає з id, як у реальній таблиці.
+
+    uniform - рівномірно між start і end, recent - щільність подвоюється кожні
+    `half_life` ближче до end (більшість записів свіжі).
+    """
+
+    def __init__(self, start: datetime, end: datetime, total: int, kind: str, half_life_days: float):
+        self.start = start
+        self.span = (end - start).total_seconds()
+        self.total = max(total, 1)
+        self.kind = kind
+        self.half_life = half_life_days * 86400
+
+    def at(self, index: int) -> datetime:
+        u = (index + 0.5) / self.total
+        if self.kind == "recent" and self.half_life > 0:
+            # Обернена CDF щільності 2^((t - span) / half_life) на [0, span]
+            k = math.log(2) / self.half_life
+            offset = self.span + math.log(u + (1 - u) * math.exp(-k * self.span)) / k
+        else:
+            offset = u * self.span
+        return self.start + timedelta(seconds=offset)
+
+
+def seed_username(index: int) -> str:
+    return f"seed_user_{index:07d}"
+
+
+def user_rows(start: int, stop: int, password_hashes):
+    return [
+        {
+            "username": seed_username(index),
+            "email": f"{seed_username(index)}@seed.local",
+            "hashed_password": password_hashes[index - start],
+            "is_active": True,
+            "is_admin": False,
+        }
+        for index in range(start, stop)
+    ]
+
+
+def record_rows(start: int, stop: int, args, record_types: dict, timeline: Timeline):
+    # Окремий генератор на пакет: той самий пакет при повторі дає ті самі дані
+    rng = random.Random(f"{args.seed}:records:{start}")
+    types, weights = list(record_types), list(record_types.values())
+    authors = max(args.users, 1)
+    rows = []
+    for index in range(start, stop):
+        if args.author_distribution == "zipf":
+            author = zipf_rank(rng, authors, args.zipf_s)
+        else:
+            author = rng.randrange(authors)
+        record_type = rng.choices(types, weights)[0]
+        created_at = timeline.at(index)
+        updated = rng.random() < args.updated_ratio
+        rows.append({
+            "title": f"{record_type} #{index}",
+            "record_type": record_type,
+            "description": f"Згенерований запис {index}",
+            "created_by": seed_username(author),
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(seconds=rng.uniform(0, 86400)) if updated else created_at,
+            "is_active": rng.random() >= args.deleted_ratio,
+        })
+    return rows
+
+
+async def get_progress(kind: str, params: dict = None):
+    """Повертає (кількість вставлених рядків, параметри прогону).
+
+    Параметри зберігаються при першому запуску і далі повертаються збережені,
+    а не передані: продовжений прогін генерує дані так само, як перший.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS seed_progress ("
+            "kind VARCHAR(50) PRIMARY KEY, "
+            "done INTEGER NOT NULL, "
+            "params TEXT NULL, "
+            "updated_at DATETIME NOT NULL)"
+        ))
+        row = (await conn.execute(text("SELECT done, params FROM seed_progress WHERE kind = :kind"), {"kind": kind})).first()
+        if row is None:
+            await conn.execute(
+                text("INSERT INTO seed_progress (kind, done, params, updated_at) VALUES (:kind, 0, :params, :now)"),
+                {"kind": kind, "params": json.dumps(params) if params is not None else None, "now": datetime.utcnow()},
+            )
+            return 0, params
+    return row.done, json.loads(row.params) if row.params else params
+
+
+async def insert_batch(statement, rows, kind: str, done: int):
+    """Вставляє пакет і зсуває позначку прогресу в одній транзакції"""
+    async with engine.begin() as conn:
+        await conn.execute(statement, rows)
+        await conn.execute(
+            text("UPDATE seed_progress SET done = :done, updated_at = :now WHERE kind = :kind"),
+            {"kind": kind, "done": done, "now": datetime.utcnow()},
+        )
+
+
+def report_progress(kind: str, done: int, total: int, inserted: int, started: float):
+    elapsed = time.monotonic() - started
+    rate = inserted / elapsed if elapsed else 0.0
+    print(f"{kind}: {done}/{total} ({rate:,.0f} рядків/с)")
+
+
+async def seed_users(args):
+    done, _ = await get_progress("users")
+    if done >= args.users:
+        print(f"users: вже є {done}, пропускаємо")
+        return
+    # IGNORE: користувач, вставлений поза seed_progress (наприклад, після очищення таблиці прогресу), не зупиняє прогін
+    statement = insert(User).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+    started, first = time.monotonic(), done
+
+    executor = None
+    if args.password_mode == "shared":
+        shared_hash = get_password_hash(args.password)
+    else:
+        # Унікальний пароль на користувача: bcrypt паралельно в усіх ядрах
+        executor = ProcessPoolExecutor(max_workers=args.hash_workers)
+    loop = asyncio.get_running_loop()
+
+    async def hashes_for(start, stop):
+        if executor is None:
+            return [shared_hash] * (stop - start)
+        return await asyncio.gather(*[
+            loop.run_in_executor(executor, get_password_hash, f"{args.password}{index}") for index in range(start, stop)
+        ])
+
+    try:
+        while done < args.users:
+            stop = min(done + args.batch_size, args.users)
+            await insert_batch(statement, user_rows(done, stop, await hashes_for(done, stop)), "users", stop)
+            done = stop
+            report_progress("users", done, args.users, done - first, started)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+async def seed_records(args):
+    # `now` розгортається один раз: продовження прогону не зсуває часову шкалу
+    params = {"start": parse_time(args.start).isoformat(), "end": parse_time(args.end).isoformat(), "total": args.records}
+    done, params = await get_progress("records", params)
+    if done >= args.records:
+        print(f"records: вже є {done}, пропускаємо")
+        return
+    record_types = parse_weights(args.record_types)
+    timeline = Timeline(
+        datetime.fromisoformat(params["start"]),
+        datetime.fromisoformat(params["end"]),
+        params["total"],
+        args.time_distribution,
+        args.half_life_days,
+    )
+    started, first = time.monotonic(), done
+
+    while done < args.records:
+        stop = min(done + args.batch_size, args.records)
+        await insert_batch(insert(Record), record_rows(done, stop, args, record_types, timeline), "records", stop)
+        done = stop
+        report_progress("records", done, args.records, done - first, started)
+
+
+async def main(args):
+    await create_tables()
+    try:
+        await seed_users(args)
+        await seed_records(args)
+    finally:
+        await engine.dispose()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Наповнення БД auth-service тестовими даними")
+    parser.add_argument("--users", type=int, default=1000, help="Скільки користувачів seed_user_NNNNNNN створити")
+    parser.add_argument("--records", type=int, default=100000, help="Скільки записів створити")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Рядків в одному INSERT і одній транзакції")
+    parser.add_argument("--seed", default="42", help="Зерно генератора: однакове зерно дає однакові дані")
+    parser.add_argument("--password", default="seedpass123", help="Пароль (shared) або префікс пароля (unique)")
+    parser.add_argument("--password-mode", choices=["shared", "unique"], default="shared",
+                        help="shared - один хеш для всіх, unique - пароль <password><номер>, хешується паралельно")
+    parser.add_argument("--hash-workers", type=int, default=None, help="Процеси для bcrypt у режимі unique (за замовчуванням - всі ядра)")
+    parser.add_argument("--record-types", default=DEFAULT_RECORD_TYPES, help="Ваги типів записів: order=5,user=2,...")
+    parser.add_argument("--author-distribution", choices=["uniform", "zipf"], default="zipf",
+                        help="Розподіл авторів записів серед seed-користувачів")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Параметр s розподілу Zipf авторів")
+    parser.add_argument("--start", default="2024-01-01T00:00:00", help="Найраніший created_at (ISO або now)")
+    parser.add_argument("--end", default="now", help="Найпізніший created_at (ISO або now)")
+    parser.add_argument("--time-distribution", choices=["uniform", "recent"], default="recent",
+                        help="uniform - рівномірно, recent - більшість записів ближче до --end")
+    parser.add_argument("--half-life-days", type=float, default=30.0, help="Для recent: щільність подвоюється кожні N днів")
+    parser.add_argument("--deleted-ratio", type=float, default=0.05, help="Частка записів, позначених видаленими (is_active = false)")
+    parser.add_argument("--updated-ratio", type=float, default=0.2, help="Частка записів з updated_at пізніше created_at")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
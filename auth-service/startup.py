@@ -0,0 +1,56 @@
+"""Підготовка з'єднань з БД при старті: очікування з повторами і прогрів пулу"""
+import asyncio
+import logging
+import random
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempt: int, base_delay: float = 0.5, max_delay: float = 10.0) -> float:
+    """Експоненційна затримка перед повтором `attempt` з jitter"""
+    return min(max_delay, base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+async def wait_for_database(engine, timeout: float = None, base_delay: float = 0.5, max_delay: float = 10.0, on_retry=None):
+    """Чекає, поки БД прийме з'єднання.
+
+    Повтори з експоненційною затримкою і jitter (щоб воркери і інстанси
+    не стукали в MySQL одночасно). Без `timeout` чекає безкінечно,
+    інакше після `timeout` секунд пробрасує останню помилку.
+    `on_retry(attempt, error)` викликається після кожної невдалої спроби.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    attempt = 0
+    while True:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return attempt
+        except Exception as e:
+            attempt += 1
+            if on_retry:
+                on_retry(attempt, e)
+            delay = retry_delay(attempt, base_delay, max_delay)
+            if deadline and time.monotonic() + delay > deadline:
+                raise
+            logger.warning(f"БД недоступна (спроба {attempt}): {e}; повтор через {delay:.1f} с")
+            await asyncio.sleep(delay)
+
+
+async def warm_pool(engine, size: int):
+    """Відкриває `size` з'єднань одночасно і повертає їх у пул,
+    щоб перші запити не чекали на встановлення з'єднання"""
+    if size <= 0:
+        return
+    connections = await asyncio.gather(*(engine.connect().start() for _ in range(size)), return_exceptions=True)
+    opened = [conn for conn in connections if not isinstance(conn, BaseException)]
+    try:
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in opened))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in opened), return_exceptions=True)
+    errors = [conn for conn in connections if isinstance(conn, BaseException)]
+    if errors:
+        raise errors[0]
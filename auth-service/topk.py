@@ -0,0 +1,44 @@
+"""Обмеження кардинальності метрик: відстеження найактивніших користувачів"""
+
+
+class SpaceSaving:
+    """Алгоритм Space-Saving (Metwally et al.) для пошуку heavy hitters.
+
+    Тримає не більше `capacity` лічильників. Новий елемент при заповненому
+    трекері замінює елемент з найменшим лічильником і успадковує його значення,
+    тому оцінки завищені щонайбільше на цю величину. Для точного top-K
+    `capacity` має бути в кілька разів більшим за K.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}
+
+    def add(self, item: str, count: int = 1):
+        self.total += count
+        if item in self._counts:
+            self._counts[item] += count
+        elif len(self._counts) < self.capacity:
+            self._counts[item] = count
+        else:
+            victim = min(self._counts, key=self._counts.get)
+            self._counts[item] = self._counts.pop(victim) + count
+
+    def top(self, k: int):
+        """Повертає k елементів з найбільшими оцінками: [(item, count), ...]"""
+        return sorted(self._counts.items(), key=lambda entry: entry[1], reverse=True)[:k]
+
+    def snapshot(self) -> dict:
+        """Стан трекера для передачі іншому процесу"""
+        return {"total": self.total, "counts": dict(self._counts)}
+
+
+def merge_snapshots(snapshots):
+    """Зводить знімки кількох трекерів (наприклад, воркерів): повертає ({item: count}, total)"""
+    counts, total = {}, 0
+    for snapshot in snapshots:
+        total += snapshot["total"]
+        for item, count in snapshot["counts"].items():
+            counts[item] = counts.get(item, 0) + count
+    return counts, total
@@ -0,0 +1,69 @@
+"""Відкладений (write-behind) запис оновлень у БД"""
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """Збирає час останнього входу в пам'яті і записує його пакетами.
+
+    `write(pending)` - корутина, що отримує {user_id: datetime} і записує все
+    одним запитом. Скид відбувається кожні `flush_interval` секунд, одразу
+    після накопичення `max_size` користувачів і при зупинці сервісу.
+    `on_flush(batch_size, lag_seconds)` викликається після успішного скиду,
+    lag - вік найстаршого запису в пакеті.
+    """
+
+    def __init__(self, write, flush_interval: float, max_size: int, on_flush=None):
+        self.write = write
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.on_flush = on_flush or (lambda batch_size, lag_seconds: None)
+        self._pending = {}
+        self._oldest = None
+        self._full = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def record(self, user_id: int, timestamp):
+        if not self._pending:
+            self._oldest = time.monotonic()
+        self._pending[user_id] = timestamp
+        if len(self._pending) >= self.max_size:
+            self._full.set()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, oldest = self._pending, self._oldest
+            self._pending, self._oldest = {}, None
+            self._full.clear()
+            try:
+                await self.write(pending)
+            except BaseException as e:
+                # Скасування (зупинка сервісу посеред скиду) не помилка запису, але пакет так само не записаний
+                if not isinstance(e, asyncio.CancelledError):
+                    logger.error(f"Не вдалося записати last_login для {len(pending)} користувачів: {e}")
+                # Повертаємо пакет у буфер, новіші значення з нього не перезаписуємо
+                pending.update(self._pending)
+                self._pending = pending
+                self._oldest = oldest
+                raise
+            self.on_flush(len(pending), time.monotonic() - oldest)
+
+    async def run(self):
+        """Фоновий цикл періодичного скиду"""
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                await asyncio.sleep(self.flush_interval)
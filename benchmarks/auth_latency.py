@@ -0,0 +1,142 @@
+"""Бенчмарк затримки auth-service на кількох рівнях конкурентності.
+
+Для кожного рівня запускає N паралельних клієнтів (closed loop) на фіксований час
+і виводить p50/p99 затримки та кількість запитів за секунду.
+
+Приклад порівняння "до" і "після":
+    git checkout <baseline> && docker-compose up -d --build auth-service
+    python auth_latency.py --output before.json
+    git checkout master && docker-compose up -d --build auth-service
+    python auth_latency.py --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import aiohttp
+
+SCENARIOS = ("mixed", "read_records", "verify", "create_record", "login")
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def login(session, url, username, password):
+    async with session.post(f"{url}/login", params={"username": username, "password": password}) as response:
+        response.raise_for_status()
+        data = await response.json()
+        return data["access_token"]
+
+
+async def one_request(session, url, scenario, headers, args):
+    """Виконує один запит сценарію і повертає HTTP статус"""
+    if scenario == "mixed":
+        scenario = random.choice(("read_records", "read_records", "verify", "create_record"))
+    if scenario == "read_records":
+        request = session.get(f"{url}/actions/read_records", headers=headers, params={"limit": 10})
+    elif scenario == "verify":
+        request = session.get(f"{url}/verify", headers=headers)
+    elif scenario == "create_record":
+        params = {"record_type": "report", "title": f"Bench #{random.randint(1000, 9999)}"}
+        request = session.post(f"{url}/actions/create_record", headers=headers, params=params)
+    else:
+        request = session.post(f"{url}/login", params={"username": args.username, "password": args.password})
+    async with request as response:
+        await response.read()
+        return response.status
+
+
+async def run_level(url, scenario, concurrency, duration, headers, args):
+    """Запускає `concurrency` клієнтів на `duration` секунд і збирає затримки"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    status = await one_request(session, url, scenario, headers, args)
+                except aiohttp.ClientError:
+                    status = 0
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def print_results(results, baseline=None):
+    header = f"{'concurrency':>11} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f" {'Δrps':>8} {'Δp99':>8}"
+    print(header)
+    previous = {row["concurrency"]: row for row in (baseline or [])}
+    for row in results:
+        line = (f"{row['concurrency']:>11} {row['requests']:>9} {row['errors']:>7} "
+                f"{row['rps']:>9.1f} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+        before = previous.get(row["concurrency"])
+        if before and before["rps"] and before["p99_ms"]:
+            line += (f" {(row['rps'] / before['rps'] - 1) * 100:>+7.1f}%"
+                     f" {(row['p99_ms'] / before['p99_ms'] - 1) * 100:>+7.1f}%")
+        print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк затримки auth-service")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--username", default="user1")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed")
+    parser.add_argument("--concurrency", default="1,10,50,100",
+                        help="Рівні конкурентності через кому")
+    parser.add_argument("--duration", type=float, default=10.0, help="Секунд на кожен рівень")
+    parser.add_argument("--output", help="Зберегти результати в JSON файл")
+    parser.add_argument("--compare", help="JSON файл попереднього запуску для порівняння")
+    args = parser.parse_args()
+
+    async with aiohttp.ClientSession() as session:
+        token = await login(session, args.url, args.username, args.password)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    results = []
+    for level in (int(value) for value in args.concurrency.split(",")):
+        row = await run_level(args.url, args.scenario, level, args.duration, headers, args)
+        results.append(row)
+        print(f"concurrency={level}: {row['rps']:.1f} req/s, p50={row['p50_ms']:.2f} ms, p99={row['p99_ms']:.2f} ms")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print()
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"scenario": args.scenario, "duration": args.duration, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
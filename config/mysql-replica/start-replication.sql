@@ -0,0 +1,14 @@
+-- Підключення репліки до primary (сервіс mysql) з автопозиціонуванням за GTID.
+-- Виконується один раз при ініціалізації тому репліки; потоки реплікації
+-- зберігають налаштування і запускаються автоматично після рестарту.
+
+CHANGE REPLICATION SOURCE TO
+    SOURCE_HOST = 'mysql',
+    SOURCE_PORT = 3306,
+    SOURCE_USER = 'root',
+    SOURCE_PASSWORD = 'rootpassword',
+    SOURCE_AUTO_POSITION = 1,
+    SOURCE_CONNECT_RETRY = 5,
+    GET_SOURCE_PUBLIC_KEY = 1;
+
+START REPLICA;
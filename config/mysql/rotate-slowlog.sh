@@ -0,0 +1,15 @@
+#!/bin/sh
+# Ротація slow log за розміром: з long_query_time = 0 файл росте з кожним запитом.
+# Файл перейменовується, FLUSH SLOW LOGS змушує mysqld відкрити новий; slowlog-exporter
+# дочитує старий файл і переходить на новий. Зберігається одна попередня копія (.1).
+while true; do
+    size=$(stat -c %s "$SLOWLOG_FILE" 2>/dev/null || echo 0)
+    if [ "$size" -gt "$SLOWLOG_ROTATE_BYTES" ]; then
+        if mv "$SLOWLOG_FILE" "$SLOWLOG_FILE.1" && mysqladmin -h "$MYSQL_HOST" -u root flush-logs slow; then
+            echo "slow log ротовано ($size байт)"
+        else
+            echo "Не вдалося ротувати slow log" >&2
+        fi
+    fi
+    sleep "$SLOWLOG_ROTATE_INTERVAL"
+done
@@ -0,0 +1,177 @@
+"""Метрики Prometheus зі slow log MySQL за відбитками запитів.
+
+    python exporter.py --log-file /var/log/mysql/mysql-slow.log --port 9105
+
+Файл читається інкрементально (нові рядки, ротація), кожен запит нормалізується
+у відбиток. Для кожного відбитка експортуються кількість, сумарний час і гістограма
+часу (p99 через histogram_quantile), час блокувань, надіслані та переглянуті рядки.
+Кількість відбитків обмежена --max-fingerprints: при переповненні відбиток з
+найменшим сумарним часом зливається в fingerprint="other", тож сума по всіх
+відбитках лишається точною, а кількість часових рядів - обмеженою.
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+
+from prometheus_client import Counter, REGISTRY, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+from fingerprint import fingerprint, fingerprint_id
+from slowlog import LogTailer, SlowLogParser
+
+logging.basicConfig(level=os.getenv("SLOWLOG_LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+
+OTHER = "other"
+DEFAULT_BUCKETS = "0.0005,0.001,0.0025,0.005,0.01,0.05,0.1,0.25,0.5,1,2,5,10,30,60"
+MAX_QUERY_LENGTH = 300
+
+entries_total = Counter("mysql_slowlog_entries_total", "Розібрані записи slow log")
+bytes_read_total = Counter("mysql_slowlog_read_bytes_total", "Прочитані байти slow log")
+rotations_total = Counter("mysql_slowlog_rotations_total", "Ротації або обрізання файлу slow log")
+merged_total = Counter("mysql_slowlog_fingerprints_merged_total", "Відбитки, злиті в other через ліміт кардинальності")
+
+
+def env(name: str, default: str) -> str:
+    return os.getenv(name, default)
+
+
+class QueryStats:
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.query_time = 0.0
+        self.lock_time = 0.0
+        self.rows_sent = 0
+        self.rows_examined = 0
+        self.buckets = [0] * bucket_count  # не кумулятивні, останній - +Inf
+
+    def merge(self, other: "QueryStats"):
+        self.count += other.count
+        self.query_time += other.query_time
+        self.lock_time += other.lock_time
+        self.rows_sent += other.rows_sent
+        self.rows_examined += other.rows_examined
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+
+class SlowQueryCollector:
+    """Накопичує статистику записів slow log за відбитками і віддає її як метрики.
+
+    `add` викликається з циклу читання, `collect` - з HTTP потоку prometheus_client.
+    """
+
+    def __init__(self, max_fingerprints: int, buckets):
+        self.max_fingerprints = max_fingerprints
+        self.bounds = sorted(buckets)
+        self._stats = {}  # fingerprint id -> QueryStats
+        self._queries = {}  # fingerprint id -> нормалізований текст
+        self._other = QueryStats(len(self.bounds) + 1)
+        self._lock = threading.Lock()
+
+    def add(self, entry: dict):
+        query = fingerprint(entry["statement"])
+        key = fingerprint_id(query)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    self._evict()
+                stats = self._stats[key] = QueryStats(len(self.bounds) + 1)
+                self._queries[key] = query[:MAX_QUERY_LENGTH]
+            stats.count += 1
+            stats.query_time += entry["query_time"]
+            stats.lock_time += entry["lock_time"]
+            stats.rows_sent += entry["rows_sent"]
+            stats.rows_examined += entry["rows_examined"]
+            stats.buckets[self._bucket(entry["query_time"])] += 1
+
+    def _bucket(self, value: float) -> int:
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                return index
+        return len(self.bounds)
+
+    def _evict(self):
+        # Нові відбитки витісняють найменш дорогі, а не найдорожчі: гарячі запити лишаються окремими рядами
+        victim = min(self._stats, key=lambda key: self._stats[key].query_time)
+        self._other.merge(self._stats.pop(victim))
+        del self._queries[victim]
+        merged_total.inc()
+
+    def collect(self):
+        duration = HistogramMetricFamily(
+            "mysql_slow_query_duration_seconds", "Час виконання запитів зі slow log за відбитком", labels=["fingerprint"]
+        )
+        lock_time = CounterMetricFamily("mysql_slow_query_lock_seconds", "Час очікування блокувань за відбитком", labels=["fingerprint"])
+        rows_sent = CounterMetricFamily("mysql_slow_query_rows_sent", "Рядки, повернуті клієнту, за відбитком", labels=["fingerprint"])
+        rows_examined = CounterMetricFamily("mysql_slow_query_rows_examined", "Рядки, переглянуті сервером, за відбитком", labels=["fingerprint"])
+        info = GaugeMetricFamily("mysql_slow_query_fingerprint_info", "Нормалізований текст відбитка", labels=["fingerprint", "query"])
+
+        with self._lock:
+            items = list(self._stats.items())
+            if self._other.count:
+                items.append((OTHER, self._other))
+            for key, stats in items:
+                cumulative, buckets = 0, []
+                for bound, count in zip([*map(str, self.bounds), "+Inf"], stats.buckets):
+                    cumulative += count
+                    buckets.append((bound, cumulative))
+                duration.add_metric([key], buckets, stats.query_time)
+                lock_time.add_metric([key], stats.lock_time)
+                rows_sent.add_metric([key], stats.rows_sent)
+                rows_examined.add_metric([key], stats.rows_examined)
+            for key, query in self._queries.items():
+                info.add_metric([key, query], 1)
+        return [duration, lock_time, rows_sent, rows_examined, info]
+
+
+def run(args):
+    users = {user.strip() for user in args.users.split(",") if user.strip()}
+    collector = SlowQueryCollector(args.max_fingerprints, [float(bound) for bound in args.buckets.split(",")])
+    REGISTRY.register(collector)
+    start_http_server(args.port)
+    logger.info(f"Читаємо {args.log_file}, метрики на :{args.port}/metrics")
+
+    tailer = LogTailer(args.log_file, from_start=args.from_start)
+    parser = SlowLogParser()
+    rotations = 0
+
+    def handle(entry):
+        if entry is None or (users and entry["user"] not in users):
+            return
+        collector.add(entry)
+        entries_total.inc()
+
+    while True:
+        lines, read = tailer.read_lines()
+        bytes_read_total.inc(read)
+        if tailer.rotations != rotations:
+            rotations_total.inc(tailer.rotations - rotations)
+            rotations = tailer.rotations
+        for line in lines:
+            handle(parser.feed(line))
+        if not lines:
+            # Останній запис завершується лише наступним; без нових рядків віддаємо його одразу
+            handle(parser.flush())
+            time.sleep(args.poll_interval)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Метрики Prometheus за відбитками запитів зі slow log MySQL")
+    parser.add_argument("--log-file", default=env("SLOWLOG_FILE", "/var/log/mysql/mysql-slow.log"), help="Файл slow log")
+    parser.add_argument("--port", type=int, default=int(env("SLOWLOG_EXPORTER_PORT", "9105")), help="Порт /metrics")
+    parser.add_argument("--max-fingerprints", type=int, default=int(env("SLOWLOG_MAX_FINGERPRINTS", "200")),
+                        help="Максимум окремих відбитків, решта зливається в other")
+    parser.add_argument("--buckets", default=env("SLOWLOG_BUCKETS", DEFAULT_BUCKETS), help="Межі гістограми часу запиту (секунди)")
+    parser.add_argument("--users", default=env("SLOWLOG_USERS", ""), help="Враховувати лише цих користувачів MySQL (через кому)")
+    parser.add_argument("--poll-interval", type=float, default=float(env("SLOWLOG_POLL_INTERVAL", "1")),
+                        help="Пауза між перевірками файлу, коли нових рядків немає (секунди)")
+    parser.add_argument("--from-start", action="store_true", default=env("SLOWLOG_FROM_START", "") == "1",
+                        help="Розібрати файл з початку, а не лише нові записи")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    run(parse_args())
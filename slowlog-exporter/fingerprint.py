@@ -0,0 +1,42 @@
+"""Нормалізація SQL у відбитки (fingerprint), як у pt-query-digest.
+
+Запити, що відрізняються лише значеннями, дають однаковий відбиток:
+
+    SELECT * FROM records WHERE id = 42 AND title = 'a'
+    -> select * from records where id = ? and title = ?
+
+Списки значень згортаються (`in (?+)`, `values (?+)`, гілки CASE), тому multi-row
+INSERT і IN з різною кількістю елементів теж належать до одного відбитка.
+"""
+import hashlib
+import re
+
+# Рядки і коментарі в одному проході: '#' чи '--' всередині рядка не є коментарем
+_STRINGS_AND_COMMENTS = re.compile(
+    r"(?P<string>\bx'[0-9a-f]*'|'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\")"
+    r"|(?P<comment>/\*.*?\*/|(?:--\s|#)[^\n]*)",
+    re.S | re.I,
+)
+_HEX = re.compile(r"\b0x[0-9a-f]+\b", re.I)
+_NUMBERS = re.compile(r"(?<![\w.`])[-+]?\d+(?:\.\d+)?(?:e[-+]?\d+)?\b", re.I)
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_CASE_BRANCHES = re.compile(r"(?:\bwhen \? then \? ?){2,}")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    query = _STRINGS_AND_COMMENTS.sub(lambda match: "?" if match.group("string") else " ", statement)
+    query = _HEX.sub("?", query)
+    query = _NUMBERS.sub("?", query)
+    query = _WHITESPACE.sub(" ", query).strip().rstrip(";").strip().lower()
+    query = query.replace("`", "")
+    query = _IN_LIST.sub("in (?+)", query)
+    query = _CASE_BRANCHES.sub("when ? then ? ", query)
+    query = re.sub(r"\bvalues\s*" + _VALUE_LISTS.pattern, "values (?+)", query)
+    return query
+
+
+def fingerprint_id(query: str) -> str:
+    """Короткий стабільний ідентифікатор відбитка для мітки метрики"""
+    return hashlib.sha1(query.encode()).hexdigest()[:16]
@@ -0,0 +1,153 @@
+"""Інкрементальне читання slow log MySQL (log_output = FILE).
+
+Запис у slow log виглядає так:
+
+    # Time: 2024-01-01T00:00:00.123456Z
+    # User@Host: dbuser[dbuser] @  [172.18.0.5]  Id:    12
+    # Query_time: 2.000123  Lock_time: 0.000010 Rows_sent: 1  Rows_examined: 100000
+    use monitoring_db;
+    SET timestamp=1704067200;
+    SELECT ...;
+
+LogTailer віддає нові рядки файлу (як `tail -F`), SlowLogParser складає з них записи.
+"""
+import os
+import re
+
+_FIELDS = re.compile(r"(\w+): +(\S+)")
+# Заголовок, який mysqld пише на початку файлу і після FLUSH SLOW LOGS
+_BANNER = re.compile(r"^(\S+, Version: .*|Tcp port: .*|Time\s+Id\s+Command\s+Argument)$")
+_USE = re.compile(r"^use `?([^`;]+)`?;$", re.I)
+_SET_TIMESTAMP = re.compile(r"^SET timestamp=\d+;$", re.I)
+
+
+class SlowLogParser:
+    """Складає рядки slow log у записи.
+
+    `feed(line)` повертає попередній запис, коли починається наступний
+    (або None). Останній запис файлу повертає `flush()`, коли нових рядків
+    немає і запит уже завершений `;`.
+    """
+
+    def __init__(self):
+        self.schema = None
+        self._reset()
+
+    def _reset(self):
+        self._header = {}
+        self._statement = []
+
+    def feed(self, line: str):
+        line = line.rstrip("\r\n")
+        if line.startswith("# "):
+            # Новий запис починається з "# Time:" (або одразу з "# User@Host:" після тексту запиту)
+            entry = self._finish() if self._statement or line.startswith("# Time:") else None
+            self._parse_header(line[2:])
+            return entry
+        if _BANNER.match(line):
+            entry = self._finish()
+            self._reset()
+            return entry
+        if not self._header:
+            return None  # хвіст запису, початок якого залишився до позиції старту
+        use = _USE.match(line.strip())
+        if use and not self._statement:
+            self.schema = use.group(1)
+        elif not (_SET_TIMESTAMP.match(line.strip()) and not self._statement):
+            self._statement.append(line)
+        return None
+
+    def flush(self):
+        if self._statement and self._statement[-1].rstrip().endswith(";"):
+            return self._finish()
+        return None
+
+    def _parse_header(self, text: str):
+        if text.startswith("User@Host:"):
+            self._header["user"] = text[len("User@Host:"):].split("[", 1)[0].strip()
+        elif text.startswith("Time:"):
+            self._header["time"] = text[len("Time:"):].strip()
+        else:
+            # Query_time, Lock_time, Rows_sent, Rows_examined і поля log_slow_extra
+            for name, value in _FIELDS.findall(text):
+                self._header[name] = value
+
+    def _finish(self):
+        header, statement = self._header, "\n".join(self._statement).strip()
+        self._reset()
+        if not statement or "Query_time" not in header:
+            return None
+        try:
+            return {
+                "time": header.get("time"),
+                "user": header.get("user"),
+                "schema": self.schema,
+                "query_time": float(header["Query_time"]),
+                "lock_time": float(header.get("Lock_time", 0)),
+                "rows_sent": int(header.get("Rows_sent", 0)),
+                "rows_examined": int(header.get("Rows_examined", 0)),
+                "statement": statement,
+            }
+        except ValueError:
+            return None
+
+
+class LogTailer:
+    """Читає рядки, дописані у файл з останнього виклику.
+
+    Переживає ротацію (файл перейменовано і створено новий) і обрізання:
+    старий файл дочитується до кінця, новий читається з початку. Якщо файлу
+    ще немає, чекає на його появу. Без `from_start` перше відкриття починає
+    з кінця файлу, тобто історія до запуску не розбирається.
+    """
+
+    def __init__(self, path: str, from_start: bool = False, chunk_size: int = 1 << 20):
+        self.path = path
+        self.from_start = from_start
+        self.chunk_size = chunk_size
+        self.rotations = 0
+        self._file = None
+        self._inode = None
+        self._started = False  # перша спроба відкриття вже була: далі файли читаються з початку
+        self._partial = b""
+
+    def _open(self) -> bool:
+        started, self._started = self._started, True
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        if not started and not self.from_start:
+            self._file.seek(0, os.SEEK_END)
+        return True
+
+    def _rotated(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False  # новий файл ще не створено, чекаємо
+        return stat.st_ino != self._inode or stat.st_size < self._file.tell()
+
+    def read_lines(self):
+        """Повертає (нові повні рядки, кількість прочитаних байтів)"""
+        if self._file is None and not self._open():
+            return [], 0
+        data = self._file.read(self.chunk_size)
+        if not data and self._rotated():
+            self._file.close()
+            self._file, self._partial = None, b""
+            self.rotations += 1
+            if not self._open():
+                return [], 0
+            data = self._file.read(self.chunk_size)
+        if not data:
+            return [], 0
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        return [line.decode("utf-8", errors="replace") for line in lines], len(data)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
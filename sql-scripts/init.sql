@@ -3,15 +3,17 @@
 
 CREATE USER IF NOT EXISTS 'exporter'@'%' IDENTIFIED BY 'exporter_password';
 GRANT PROCESS, REPLICATION CLIENT, SELECT ON *.* TO 'exporter'@'%';
+-- auth-service перевіряє відставання реплік через SHOW REPLICA STATUS
+GRANT REPLICATION CLIENT ON *.* TO 'dbuser'@'%';
 FLUSH PRIVILEGES;
 
 -- Створення індексів для оптимізації запитів
 USE monitoring_db;
 
 -- Налаштування для кращого моніторингу
+-- Поріг slow log (long_query_time) задає config/mysql/my.cnf
 SET GLOBAL slow_query_log = 'ON';
-SET GLOBAL long_query_time = 2;
-SET GLOBAL general_log = 'ON';
+SET GLOBAL general_log = 'OFF';
 
 -- Інформація про налаштування
 SELECT 
@@ -0,0 +1,91 @@
+"""Гістограма затримок з високим динамічним діапазоном (HDR).
+
+Значення зберігаються в мікросекундах у лог-лінійних бакетах, як у HdrHistogram:
+до 2^k значення точні, далі кожна степінь двійки ділиться на 2^(k-1) під-бакетів.
+Відносна похибка не перевищує 10^-significant_figures при будь-якому діапазоні
+(від мікросекунд до хвилин), пам'ять пропорційна кількості заповнених бакетів.
+Гістограми можна об'єднувати та серіалізувати в JSON.
+"""
+import math
+
+
+class LatencyHistogram:
+    def __init__(self, significant_figures: int = 3):
+        self.significant_figures = significant_figures
+        self._bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        self._sub_bucket_count = 1 << self._bits
+        self._half_count = self._sub_bucket_count >> 1
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_bucket_count:
+            return value
+        shift = value.bit_length() - self._bits
+        sub_bucket = value >> shift
+        return self._sub_bucket_count + (shift - 1) * self._half_count + (sub_bucket - self._half_count)
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self._sub_bucket_count:
+            return index
+        shift = (index - self._sub_bucket_count) // self._half_count + 1
+        sub_bucket = (index - self._sub_bucket_count) % self._half_count + self._half_count
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percentile: float) -> float:
+        """Значення перцентиля в секундах"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(percentile / 100.0 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def mean(self) -> float:
+        return self.total / self.count / 1_000_000 if self.count else 0.0
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.significant_figures != self.significant_figures:
+            raise ValueError("Гістограми з різною точністю не об'єднуються")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def to_dict(self) -> dict:
+        return {
+            "significant_figures": self.significant_figures,
+            "counts": {str(index): count for index, count in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls(data["significant_figures"])
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
@@ -0,0 +1,125 @@
+"""Звіти навантажувального прогону та їх порівняння.
+
+    python report.py compare before.json after.json --threshold 10
+
+Порівняння завершується з кодом 1, якщо знайдено регресії.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from histogram import LatencyHistogram
+
+PERCENTILES = {"p50": 50, "p90": 90, "p99": 99, "p99.9": 99.9}
+SUCCESS_STATUS = "200"
+
+
+def latency_summary(histogram: LatencyHistogram) -> dict:
+    summary = {name: round(histogram.percentile(value) * 1000, 3) for name, value in PERCENTILES.items()}
+    summary["mean"] = round(histogram.mean() * 1000, 3)
+    summary["max"] = round((histogram.max or 0) / 1000, 3)
+    return summary
+
+
+def build_report(histograms: dict, elapsed: float, extra: dict = None) -> dict:
+    """Звіт з гістограм {(action, status): LatencyHistogram} за `elapsed` секунд"""
+    actions = {}
+    all_requests = LatencyHistogram()
+    errors_total = 0
+
+    for action in sorted({action for action, _ in histograms}):
+        combined = LatencyHistogram()
+        statuses = {}
+        errors = 0
+        for (name, status), histogram in sorted(histograms.items()):
+            if name != action or not histogram.count:
+                continue
+            combined.merge(histogram)
+            statuses[status] = {"count": histogram.count, "latency_ms": latency_summary(histogram)}
+            if status != SUCCESS_STATUS:
+                errors += histogram.count
+        if not combined.count:
+            continue
+        all_requests.merge(combined)
+        errors_total += errors
+        actions[action] = {
+            "count": combined.count,
+            "errors": errors,
+            "error_rate": round(errors / combined.count, 6),
+            "throughput_rps": round(combined.count / elapsed, 3) if elapsed else 0.0,
+            "latency_ms": latency_summary(combined),
+            "statuses": statuses,
+        }
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "elapsed_seconds": round(elapsed, 3),
+        "total": {
+            "count": all_requests.count,
+            "errors": errors_total,
+            "error_rate": round(errors_total / all_requests.count, 6) if all_requests.count else 0.0,
+            "throughput_rps": round(all_requests.count / elapsed, 3) if elapsed else 0.0,
+            "latency_ms": latency_summary(all_requests),
+        },
+        "actions": actions,
+    }
+    report.update(extra or {})
+    return report
+
+
+def compare_reports(baseline: dict, candidate: dict, threshold: float, error_threshold: float = 1.0) -> list:
+    """Повертає регресії кандидата відносно базового звіту.
+
+    Регресія - зростання перцентиля затримки або падіння пропускної здатності
+    більш ніж на `threshold` відсотків, або зростання частки помилок більш ніж
+    на `error_threshold` процентних пунктів.
+    """
+    regressions = []
+    sections = [("total", baseline["total"], candidate["total"])]
+    sections += [
+        (action, baseline["actions"][action], candidate["actions"][action])
+        for action in sorted(set(baseline["actions"]) & set(candidate["actions"]))
+    ]
+
+    for name, before, after in sections:
+        for percentile in PERCENTILES:
+            old, new = before["latency_ms"][percentile], after["latency_ms"][percentile]
+            if old > 0 and (new - old) / old * 100 > threshold:
+                regressions.append(f"{name}: {percentile} {old:.2f} ms -> {new:.2f} ms ({(new - old) / old * 100:+.1f}%)")
+        old, new = before["throughput_rps"], after["throughput_rps"]
+        if old > 0 and (old - new) / old * 100 > threshold:
+            regressions.append(f"{name}: throughput {old:.1f} -> {new:.1f} req/s ({(new - old) / old * 100:+.1f}%)")
+        old, new = before["error_rate"], after["error_rate"]
+        if (new - old) * 100 > error_threshold:
+            regressions.append(f"{name}: error rate {old * 100:.2f}% -> {new * 100:.2f}%")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Робота зі звітами user-simulator")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compare = subparsers.add_parser("compare", help="Порівняти два звіти і показати регресії")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--threshold", type=float, default=10.0, help="Допустиме погіршення затримки та пропускної здатності, відсотків")
+    compare.add_argument("--error-threshold", type=float, default=1.0, help="Допустиме зростання частки помилок, процентних пунктів")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressions = compare_reports(baseline, candidate, args.threshold, args.error_threshold)
+    if regressions:
+        print(f"❌ Регресії (поріг {args.threshold}%):")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print(f"✅ Регресій не знайдено (поріг {args.threshold}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,150 @@
+import argparse
 import asyncio
 import aiohttp
 import random
 import json
+import os
+import time
 from datetime import datetime
 import logging
+import multiprocessing
+import queue
+import signal
+
+from histogram import LatencyHistogram
+from report import build_report
 
 # Налаштування логування
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv("SIM_LOG_LEVEL", "INFO"))
 logger = logging.getLogger(__name__)
 
+DEFAULT_USERS = "admin:admin123,user1:password123,user2:password456,developer:dev123,manager:mgr789"
+DEFAULT_ACTION_MIX = "create_record=1,update_record=1,delete_record=1,read_records=1"
+
+def parse_users(value):
+    """'login:password,login2:password2' -> [{"username": ..., "password": ...}]"""
+    users = []
+    for item in value.split(","):
+        username, _, password = item.strip().partition(":")
+        if username:
+            users.append({"username": username, "password": password})
+    return users
+
+def parse_action_mix(value):
+    """'create_record=2,read_records=5' -> {"create_record": 2.0, "read_records": 5.0}"""
+    mix = {}
+    for item in value.split(","):
+        action, _, weight = item.strip().partition("=")
+        if action:
+            mix[action] = float(weight or 1)
+    unknown = set(mix) - set(UserSimulator.ACTIONS)
+    if unknown:
+        raise ValueError(f"Невідомі дії в суміші: {', '.join(sorted(unknown))}")
+    return mix
+
+class LoadProfile:
+    """Цільова інтенсивність надходження запитів (запитів/с) в момент t від старту"""
+    
+    def __init__(self, kind="constant", rate=10.0, rate_end=None, ramp_duration=60.0, step_rates=None, step_duration=60.0):
+        self.kind = kind
+        self.rate = rate
+        self.rate_end = rate if rate_end is None else rate_end
+        self.ramp_duration = ramp_duration
+        self.step_rates = step_rates or [rate]
+        self.step_duration = step_duration
+    
+    def rate_at(self, t):
+        if self.kind == "ramp":
+            progress = min(1.0, t / self.ramp_duration) if self.ramp_duration > 0 else 1.0
+            return self.rate + (self.rate_end - self.rate) * progress
+        if self.kind == "step":
+            step = min(int(t // self.step_duration), len(self.step_rates) - 1)
+            return self.step_rates[step]
+        return self.rate
+
+class RecordIdPool:
+    """Локальний пул id живих записів для вибору цілей update/delete без попереднього читання.
+    
+    uniform - всі записи рівноймовірні; zipf - ймовірність запису з рангом r пропорційна 1/r^s,
+    тож невелика група "гарячих" записів отримує більшість змін (відтворення конкуренції за рядки).
+    """
+    
+    def __init__(self, distribution="uniform", zipf_s=1.1, max_size=100000):
+        self.distribution = distribution
+        self.zipf_s = zipf_s
+        self.max_size = max_size
+        self._ids = []
+        self._positions = {}
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def add(self, record_id):
+        if record_id in self._positions or len(self._ids) >= self.max_size:
+            return
+        self._positions[record_id] = len(self._ids)
+        self._ids.append(record_id)
+    
+    def remove(self, record_id):
+        position = self._positions.pop(record_id, None)
+        if position is None:
+            return
+        last = self._ids.pop()
+        if position < len(self._ids):
+            self._ids[position] = last
+            self._positions[last] = position
+    
+    def pick(self):
+        if not self._ids:
+            return None
+        if self.distribution == "zipf":
+            return self._ids[self._zipf_rank(len(self._ids))]
+        return random.choice(self._ids)
+    
+    def _zipf_rank(self, n):
+        # Обернена функція розподілу неперервного наближення Zipf на [1, n + 1)
+        u = random.random()
+        if self.zipf_s == 1.0:
+            x = (n + 1) ** u
+        else:
+            exponent = 1.0 - self.zipf_s
+            x = (1.0 + u * ((n + 1) ** exponent - 1.0)) ** (1.0 / exponent)
+        return min(int(x) - 1, n - 1)
+
 class UserSimulator:
-    def __init__(self):
-        self.auth_service_url = "http://auth-service:8080"
-        self.users = [
-            {"username": "admin", "password": "admin123"},
-            {"username": "user1", "password": "password123"},
-            {"username": "user2", "password": "password456"},
-            {"username": "developer", "password": "dev123"},
-            {"username": "manager", "password": "mgr789"}
-        ]
-        self.actions = ["create_record", "update_record", "delete_record", "read_records"]
+    ACTIONS = ["create_record", "update_record", "delete_record", "read_records"]
+    
+    def __init__(self, auth_service_url="http://auth-service:8080", users=None, action_mix=None, vusers=0, vuser_password="simpass123", record_pool=None,
+                 shard=(0, 1), connector_limit=0, keepalive_timeout=30.0):
+        self.auth_service_url = auth_service_url
+        all_users = users if users is not None else parse_users(DEFAULT_USERS)
+        # Воркер (shard_index з shard_count) обслуговує лише свою частину користувачів
+        self.shard_index, self.shard_count = shard
+        self.base_users = all_users[self.shard_index::self.shard_count] or all_users
+        self.connector_limit = connector_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.actions = list(self.ACTIONS)
+        self.action_mix = action_mix or {action: 1.0 for action in self.actions}
         self.record_types = ["user", "product", "order", "report", "config"]
         self.tokens = {}
+        
+        # Віртуальні користувачі понад заданий список реєструються автоматично
+        self.virtual_users = [
+            {"username": f"sim_vuser_{index:05d}", "password": vuser_password}
+            for index in range(max(0, vusers - len(all_users)))
+        ][self.shard_index::self.shard_count]
+        self.users = self.base_users + self.virtual_users
+        self.stats = {"issued": 0, "succeeded": 0, "failed": 0, "dropped": 0}
+        
+        # Затримки за (дія, статус): за весь прогін і за поточний інтервал звіту
+        self.latencies = {}
+        self.interval_latencies = {}
+        self.started_at = time.monotonic()
+        self.interval_started_at = self.started_at
+        self.in_flight = set()
+        self.target_rate = None
+        self.run_info = {}
+        self.record_pool = record_pool or RecordIdPool()
     
     async def login_user(self, session, username, password):
         """Авторизація користувача та отримання токену"""
@@ -44,7 +167,7 @@ class UserSimulator:
     
     async def register_users(self, session):
         """Реєстрація тестових користувачів"""
-        for user in self.users[1:]:  # Пропускаємо admin, він вже існує
+        for user in self.base_users[1:]:  # Пропускаємо admin, він вже існує
             try:
                 url = f"{self.auth_service_url}/register"
                 data = {
@@ -64,9 +187,9 @@ class UserSimulator:
                 logger.error(f"❌ Помилка реєстрації {user['username']}: {e}")
     
     async def perform_action(self, session, username, action):
-        """Виконання дії користувача"""
+        """Виконання дії користувача. Повертає статус: HTTP код, no_token, no_target або error"""
         if username not in self.tokens:
-            return False
+            return "no_token"
         
         headers = {"Authorization": f"Bearer {self.tokens[username]}"}
         
@@ -82,53 +205,46 @@ class UserSimulator:
                     "description": description
                 }
                 async with session.post(url, headers=headers, params=params) as response:
-                    success = response.status == 200
-                    if success:
+                    if response.status == 200:
+                        data = await response.json()
+                        self.record_pool.add(data["record_id"])
                         logger.info(f"📝 {username} створив запис '{title}' типу {record_type}")
-                    return success
+                    return str(response.status)
                     
             elif action == "update_record":
-                # Спочатку отримаємо існуючі записи
-                url_read = f"{self.auth_service_url}/actions/read_records"
-                async with session.get(url_read, headers=headers, params={"limit": 5}) as read_response:
-                    if read_response.status == 200:
-                        data = await read_response.json()
-                        if data["records"]:
-                            record = random.choice(data["records"])
-                            record_id = record["id"]
-                            new_title = f"Оновлений {record['title']} - {datetime.now().strftime('%H:%M:%S')}"
-                            
-                            url = f"{self.auth_service_url}/actions/update_record"
-                            params = {
-                                "record_id": record_id,
-                                "title": new_title,
-                                "description": f"Оновлено користувачем {username}"
-                            }
-                            async with session.post(url, headers=headers, params=params) as response:
-                                success = response.status == 200
-                                if success:
-                                    logger.info(f"✏️ {username} оновив запис ID {record_id}")
-                                return success
-                return False
+                record_id, status = await self.pick_target(session, headers)
+                if record_id is None:
+                    return status
+                new_title = f"Оновлений запис {record_id} - {datetime.now().strftime('%H:%M:%S')}"
+                
+                url = f"{self.auth_service_url}/actions/update_record"
+                params = {
+                    "record_id": record_id,
+                    "title": new_title,
+                    "description": f"Оновлено користувачем {username}"
+                }
+                async with session.post(url, headers=headers, params=params) as response:
+                    if response.status == 200:
+                        logger.info(f"✏️ {username} оновив запис ID {record_id}")
+                    elif response.status == 404:
+                        self.record_pool.remove(record_id)  # запис вже видалено кимось іншим
+                    return str(response.status)
                     
             elif action == "delete_record":
-                # Спочатку отримаємо існуючі записи
-                url_read = f"{self.auth_service_url}/actions/read_records"
-                async with session.get(url_read, headers=headers, params={"limit": 3}) as read_response:
-                    if read_response.status == 200:
-                        data = await read_response.json()
-                        if data["records"]:
-                            record = random.choice(data["records"])
-                            record_id = record["id"]
-                            
-                            url = f"{self.auth_service_url}/actions/delete_record"
-                            params = {"record_id": record_id}
-                            async with session.delete(url, headers=headers, params=params) as response:
-                                success = response.status == 200
-                                if success:
-                                    logger.info(f"🗑️ {username} видалив запис ID {record_id}")
-                                return success
-                return False
+                record_id, status = await self.pick_target(session, headers)
+                if record_id is None:
+                    return status
+                # Прибираємо з пулу одразу, щоб паралельні дії не обирали той самий запис
+                self.record_pool.remove(record_id)
+                
+                url = f"{self.auth_service_url}/actions/delete_record"
+                params = {"record_id": record_id}
+                async with session.delete(url, headers=headers, params=params) as response:
+                    if response.status == 200:
+                        logger.info(f"🗑️ {username} видалив запис ID {record_id}")
+                    elif response.status != 404:
+                        self.record_pool.add(record_id)  # запис живий, видалити не вдалося
+                    return str(response.status)
                     
             elif action == "read_records":
                 record_type = random.choice(self.record_types) if random.random() < 0.5 else None
@@ -137,17 +253,72 @@ class UserSimulator:
                 if record_type:
                     params["record_type"] = record_type
                 async with session.get(url, headers=headers, params=params) as response:
-                    success = response.status == 200
-                    if success:
+                    if response.status == 200:
                         data = await response.json()
+                        for record in data["records"]:
+                            self.record_pool.add(record["id"])
                         logger.info(f"📖 {username} прочитав {data['count']} записів")
-                    return success
+                    return str(response.status)
                     
         except Exception as e:
             logger.error(f"❌ Помилка виконання дії {action} користувачем {username}: {e}")
-            return False
+            return "error"
+        
+        return "error"
+    
+    async def pick_target(self, session, headers):
+        """Ціль для update/delete з локального пулу; читання з сервісу лише якщо пул порожній.
+        Повертає (record_id, None) або (None, статус)"""
+        record_id = self.record_pool.pick()
+        if record_id is not None:
+            return record_id, None
+        
+        url_read = f"{self.auth_service_url}/actions/read_records"
+        async with session.get(url_read, headers=headers, params={"limit": 50}) as read_response:
+            if read_response.status != 200:
+                return None, str(read_response.status)
+            data = await read_response.json()
+        for record in data["records"]:
+            self.record_pool.add(record["id"])
+        
+        record_id = self.record_pool.pick()
+        return (record_id, None) if record_id is not None else (None, "no_target")
+    
+    async def register_virtual_users(self, session, concurrency=8):
+        """Реєстрація згенерованих віртуальних користувачів"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def register(user):
+            params = {
+                "username": user["username"],
+                "email": f"{user['username']}@sim.local",
+                "password": user["password"]
+            }
+            async with semaphore:
+                try:
+                    async with session.post(f"{self.auth_service_url}/register", params=params) as response:
+                        if response.status not in (200, 400):
+                            logger.warning(f"❌ Помилка реєстрації {user['username']}: {response.status}")
+                except Exception as e:
+                    logger.error(f"❌ Помилка реєстрації {user['username']}: {e}")
+        
+        await asyncio.gather(*(register(user) for user in self.virtual_users))
+        if self.virtual_users:
+            logger.info(f"✅ Віртуальних користувачів підготовлено: {len(self.virtual_users)}")
+    
+    async def login_all(self, session, concurrency=8):
+        """Початкова авторизація всіх користувачів з обмеженою паралельністю"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def login(user):
+            async with semaphore:
+                await self.login_user(session, user["username"], user["password"])
         
-        return False
+        await asyncio.gather(*(login(user) for user in self.users))
+    
+    def choose_action(self):
+        actions = list(self.action_mix)
+        return random.choices(actions, weights=[self.action_mix[action] for action in actions])[0]
     
     async def simulate_user_activity(self, session):
         """Симуляція активності одного користувача"""
@@ -159,24 +330,29 @@ class UserSimulator:
             await self.login_user(session, username, user["password"])
         
         # Виконання випадкової дії
-        action = random.choice(self.actions)
-        await self.perform_action(session, username, action)
+        action = self.choose_action()
+        status = await self.perform_action(session, username, action)
+        if status == "401":
+            self.tokens.pop(username, None)  # токен недійсний, наступного разу увійдемо заново
+        return action, status
     
     async def continuous_simulation(self):
         """Безперервна симуляція активності користувачів"""
         logger.info("🚀 Запуск симулятора активності користувачів...")
         
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(connector=self.make_connector(100)) as session:
             # Реєстрація користувачів
             await self.register_users(session)
+            await self.register_virtual_users(session)
             await asyncio.sleep(2)
             
-            # Початкова авторизація всіх користувачів
-            for user in self.users:
+            # Початкова авторизація базових користувачів; віртуальні входять при першій дії
+            for user in self.base_users:
                 await self.login_user(session, user["username"], user["password"])
                 await asyncio.sleep(0.5)
             
             logger.info("✅ Симулятор готовий. Початок симуляції активності...")
+            self.started_at = self.interval_started_at = time.monotonic()
             
             # Безперервна симуляція
             while True:
@@ -185,7 +361,7 @@ class UserSimulator:
                 tasks = []
                 
                 for _ in range(num_actions):
-                    task = self.simulate_user_activity(session)
+                    task = self.tracked_activity(session, time.monotonic())
                     tasks.append(task)
                 
                 await asyncio.gather(*tasks)
@@ -195,9 +371,357 @@ class UserSimulator:
                 logger.info(f"⏱️ Пауза {delay} секунд до наступної хвилі активності...")
                 await asyncio.sleep(delay)
 
-async def main():
-    simulator = UserSimulator()
-    await simulator.continuous_simulation()
+    def make_connector(self, default_limit):
+        """Пул з'єднань: обмеження одночасних з'єднань і keep-alive між запитами"""
+        limit = self.connector_limit or default_limit
+        return aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+
+    def record_latency(self, action, status, seconds):
+        for histograms in (self.latencies, self.interval_latencies):
+            histogram = histograms.get((action, status))
+            if histogram is None:
+                histogram = histograms[(action, status)] = LatencyHistogram()
+            histogram.record(seconds)
+    
+    async def tracked_activity(self, session, intended_start):
+        """Одна дія з вимірюванням затримки від запланованого часу старту"""
+        try:
+            action, status = await self.simulate_user_activity(session)
+        except Exception as e:
+            logger.error(f"❌ Помилка запланованої дії: {e}")
+            action, status = "unknown", "error"
+        # Затримка рахується від моменту, коли запит мав бути відправлений за розкладом
+        self.record_latency(action, status, time.monotonic() - intended_start)
+        self.stats["succeeded" if status == "200" else "failed"] += 1
+    
+    def report_extra(self, window):
+        return {
+            "window": window,
+            **self.run_info,
+            "target_rate_rps": self.target_rate,
+            "in_flight": len(self.in_flight),
+            "stats": dict(self.stats),
+        }
+    
+    async def report_loop(self, interval):
+        """Періодичний JSON звіт за останній інтервал"""
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            report = build_report(self.interval_latencies, now - self.interval_started_at, self.report_extra("interval"))
+            self.interval_latencies = {}
+            self.interval_started_at = now
+            logger.info(f"📊 {json.dumps(report, ensure_ascii=False)}")
+    
+    def snapshot(self, final=False):
+        """Стан воркера для батьківського процесу: лічильники і гістограми"""
+        snapshot = {
+            "shard": self.shard_index,
+            "final": final,
+            "stats": dict(self.stats),
+            "in_flight": len(self.in_flight),
+            "target_rate": self.target_rate,
+            "elapsed": time.monotonic() - self.started_at,
+        }
+        if final:
+            snapshot["latencies"] = dump_histograms(self.latencies)
+        else:
+            snapshot["latencies"] = dump_histograms(self.interval_latencies)
+            self.interval_latencies = {}
+        return snapshot
+    
+    async def publish_loop(self, results, interval):
+        """Періодично передає інтервальні гістограми батьківському процесу"""
+        while True:
+            await asyncio.sleep(interval)
+            results.put(self.snapshot())
+    
+    def final_report(self, path=None):
+        """Звіт за весь прогін: в лог і, якщо задано, у файл"""
+        report = build_report(self.latencies, time.monotonic() - self.started_at, self.report_extra("final"))
+        logger.info(f"🏁 {json.dumps(report, ensure_ascii=False)}")
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            logger.info(f"💾 Звіт збережено в {path}")
+        return report
+    
+    async def open_model_simulation(self, profile, duration=0, arrivals="poisson", max_in_flight=1000):
+        """Відкрита модель навантаження: запити надходять за розкладом профілю,
+        незалежно від того, чи повернулись відповіді на попередні (без coordinated omission)"""
+        logger.info(f"🚀 Запуск відкритої моделі навантаження: профіль {profile.kind}, {len(self.users)} користувачів")
+        
+        async with aiohttp.ClientSession(connector=self.make_connector(max_in_flight)) as session:
+            await self.register_users(session)
+            await self.register_virtual_users(session)
+            await self.login_all(session)
+            
+            in_flight = self.in_flight
+            start = self.started_at = self.interval_started_at = time.monotonic()
+            next_arrival = start
+            
+            while True:
+                elapsed = next_arrival - start
+                if duration and elapsed >= duration:
+                    break
+                
+                rate = self.target_rate = profile.rate_at(elapsed)
+                if rate <= 0:
+                    next_arrival += 0.1
+                    await asyncio.sleep(max(0.0, next_arrival - time.monotonic()))
+                    continue
+                
+                # Час наступного запиту рахується від розкладу, а не від моменту завершення попередніх
+                next_arrival += random.expovariate(rate) if arrivals == "poisson" else 1.0 / rate
+                delay = next_arrival - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                
+                self.stats["issued"] += 1
+                if len(in_flight) >= max_in_flight:
+                    # Клієнт не встигає: фіксуємо пропуск замість того, щоб мовчки пригальмувати розклад
+                    self.stats["dropped"] += 1
+                else:
+                    task = asyncio.create_task(self.tracked_activity(session, next_arrival))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+            
+            await asyncio.gather(*in_flight)
+            logger.info(f"🏁 Навантаження завершено: {self.stats}")
+
+def dump_histograms(histograms):
+    return [[action, status, histogram.to_dict()] for (action, status), histogram in histograms.items()]
+
+def load_histograms(items, into=None):
+    """Об'єднує серіалізовані гістограми в словник {(action, status): LatencyHistogram}"""
+    histograms = {} if into is None else into
+    for action, status, data in items:
+        histogram = LatencyHistogram.from_dict(data)
+        if (action, status) in histograms:
+            histograms[(action, status)].merge(histogram)
+        else:
+            histograms[(action, status)] = histogram
+    return histograms
+
+def env(name, default):
+    return os.getenv(name, default)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Симулятор активності користувачів auth-service")
+    parser.add_argument("--url", default=env("AUTH_SERVICE_URL", "http://auth-service:8080"), help="Адреса auth-service")
+    parser.add_argument("--mode", choices=["closed", "open"], default=env("SIM_MODE", "closed"),
+                        help="closed - хвилі дій з паузами, open - цільова інтенсивність запитів")
+    parser.add_argument("--users", default=env("SIM_USERS", DEFAULT_USERS), help="Користувачі у форматі login:password,...")
+    parser.add_argument("--vusers", type=int, default=int(env("SIM_VUSERS", "0")),
+                        help="Кількість віртуальних користувачів (нестача доповнюється згенерованими)")
+    parser.add_argument("--vuser-password", default=env("SIM_VUSER_PASSWORD", "simpass123"))
+    parser.add_argument("--action-mix", default=env("SIM_ACTION_MIX", DEFAULT_ACTION_MIX),
+                        help="Ваги дій, наприклад read_records=6,create_record=2,update_record=1,delete_record=1")
+    parser.add_argument("--profile", choices=["constant", "ramp", "step"], default=env("SIM_PROFILE", "constant"))
+    parser.add_argument("--rate", type=float, default=float(env("SIM_RATE", "10")), help="Цільова інтенсивність, запитів/с")
+    parser.add_argument("--rate-end", type=float, default=float(env("SIM_RATE_END", "100")), help="Кінцева інтенсивність для ramp")
+    parser.add_argument("--ramp-duration", type=float, default=float(env("SIM_RAMP_DURATION", "300")))
+    parser.add_argument("--step-rates", default=env("SIM_STEP_RATES", "10,50,100,200"), help="Інтенсивності сходинок для step")
+    parser.add_argument("--step-duration", type=float, default=float(env("SIM_STEP_DURATION", "60")))
+    parser.add_argument("--arrivals", choices=["poisson", "uniform"], default=env("SIM_ARRIVALS", "poisson"),
+                        help="Розподіл інтервалів між запитами")
+    parser.add_argument("--duration", type=float, default=float(env("SIM_DURATION", "0")), help="Тривалість (секунди), 0 - безкінечно")
+    parser.add_argument("--max-in-flight", type=int, default=int(env("SIM_MAX_IN_FLIGHT", "1000")),
+                        help="Максимум одночасних запитів, надлишок рахується як пропущений")
+    parser.add_argument("--target-distribution", choices=["uniform", "zipf"], default=env("SIM_TARGET_DISTRIBUTION", "uniform"),
+                        help="Розподіл вибору записів для update/delete")
+    parser.add_argument("--zipf-s", type=float, default=float(env("SIM_ZIPF_S", "1.1")),
+                        help="Параметр s розподілу Zipf: більше - гарячіші перші записи")
+    parser.add_argument("--record-pool-size", type=int, default=int(env("SIM_RECORD_POOL_SIZE", "100000")),
+                        help="Максимум id записів у локальному пулі")
+    parser.add_argument("--workers", type=int, default=int(env("SIM_WORKERS", "1")),
+                        help="Кількість процесів-воркерів; інтенсивність і користувачі діляться між ними")
+    parser.add_argument("--connector-limit", type=int, default=int(env("SIM_CONNECTOR_LIMIT", "0")),
+                        help="Максимум з'єднань на воркер, 0 - за замовчуванням (max-in-flight або 100)")
+    parser.add_argument("--keepalive-timeout", type=float, default=float(env("SIM_KEEPALIVE_TIMEOUT", "30")),
+                        help="Скільки секунд тримати простоююче keep-alive з'єднання")
+    parser.add_argument("--report-interval", type=float, default=float(env("SIM_REPORT_INTERVAL", "10")),
+                        help="Інтервал періодичних JSON звітів (секунди)")
+    parser.add_argument("--report", default=env("SIM_REPORT", ""), help="Файл для фінального JSON звіту")
+    return parser.parse_args(argv)
+
+def build_simulator(args, shard=0, workers=1):
+    return UserSimulator(
+        auth_service_url=args.url,
+        users=parse_users(args.users),
+        action_mix=parse_action_mix(args.action_mix),
+        vusers=args.vusers,
+        vuser_password=args.vuser_password,
+        record_pool=RecordIdPool(args.target_distribution, args.zipf_s, args.record_pool_size),
+        shard=(shard, workers),
+        connector_limit=args.connector_limit,
+        keepalive_timeout=args.keepalive_timeout,
+    )
+
+def run_info(args):
+    return {"mode": args.mode, "profile": args.profile if args.mode == "open" else None, "workers": args.workers}
+
+async def main(args):
+    # docker stop (SIGTERM) завершує прогін так само, як Ctrl+C: з фінальним звітом
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    simulator = build_simulator(args)
+    simulator.run_info = run_info(args)
+    reporter = asyncio.create_task(simulator.report_loop(args.report_interval))
+    try:
+        await run_simulation(simulator, args)
+    finally:
+        reporter.cancel()
+        simulator.final_report(args.report or None)
+
+async def run_simulation(simulator, args, workers=1):
+    if args.mode == "open":
+        # Кожен воркер генерує свою частку загальної інтенсивності
+        profile = LoadProfile(
+            kind=args.profile,
+            rate=args.rate / workers,
+            rate_end=args.rate_end / workers,
+            ramp_duration=args.ramp_duration,
+            step_rates=[float(rate) / workers for rate in args.step_rates.split(",")],
+            step_duration=args.step_duration,
+        )
+        await simulator.open_model_simulation(
+            profile,
+            duration=args.duration,
+            arrivals=args.arrivals,
+            max_in_flight=max(1, -(-args.max_in_flight // workers)),
+        )
+    else:
+        await simulator.continuous_simulation()
+
+async def worker_main(args, shard, results):
+    # SIGTERM завершує воркер так само м'яко, як Ctrl+C: з фінальним знімком
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    simulator = build_simulator(args, shard, args.workers)
+    publisher = asyncio.create_task(simulator.publish_loop(results, args.report_interval))
+    try:
+        await run_simulation(simulator, args, args.workers)
+    finally:
+        publisher.cancel()
+        results.put(simulator.snapshot(final=True))
+
+def run_worker(args, shard, results):
+    """Точка входу процесу-воркера: власний event loop і власний пул з'єднань"""
+    try:
+        asyncio.run(worker_main(args, shard, results))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+class ShardAggregator:
+    """Збирає знімки воркерів і будує з них спільні звіти"""
+    
+    def __init__(self, workers, info):
+        self.workers = workers
+        self.info = info
+        self.started_at = time.monotonic()
+        self.interval_started_at = self.started_at
+        self.interval_latencies = {}
+        self.latencies = {}
+        self.shards = {}
+        self.finished = set()
+    
+    def add(self, snapshot):
+        shard = snapshot["shard"]
+        self.shards[shard] = snapshot
+        if snapshot["final"]:
+            # Фінальний знімок містить усі гістограми воркера за прогін
+            self.finished.add(shard)
+            load_histograms(snapshot["latencies"], self.latencies)
+        else:
+            load_histograms(snapshot["latencies"], self.interval_latencies)
+    
+    def extra(self, window):
+        stats = {}
+        for snapshot in self.shards.values():
+            for key, value in snapshot["stats"].items():
+                stats[key] = stats.get(key, 0) + value
+        rates = [snapshot["target_rate"] for snapshot in self.shards.values() if snapshot["target_rate"] is not None]
+        return {
+            "window": window,
+            **self.info,
+            "workers_reporting": len(self.shards),
+            "target_rate_rps": sum(rates) if rates else None,
+            "in_flight": sum(snapshot["in_flight"] for snapshot in self.shards.values()),
+            "stats": stats,
+        }
+    
+    def interval_report(self):
+        now = time.monotonic()
+        report = build_report(self.interval_latencies, now - self.interval_started_at, self.extra("interval"))
+        self.interval_latencies = {}
+        self.interval_started_at = now
+        return report
+    
+    def final_report(self):
+        elapsed = max((snapshot["elapsed"] for snapshot in self.shards.values()), default=time.monotonic() - self.started_at)
+        return build_report(self.latencies, elapsed, self.extra("final"))
+
+def run_sharded(args):
+    """Запускає воркери в окремих процесах і зводить їхні результати"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [
+        context.Process(target=run_worker, args=(args, shard, results), name=f"sim-worker-{shard}", daemon=True)
+        for shard in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"🚀 Запущено {args.workers} воркерів")
+    
+    def forward_sigterm(signum, frame):
+        # docker stop надсилає SIGTERM лише батьківському процесу: передаємо його воркерам
+        nonlocal deadline
+        deadline = time.monotonic() + 10
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+    deadline = None
+    signal.signal(signal.SIGTERM, forward_sigterm)
+    
+    aggregator = ShardAggregator(args.workers, run_info(args))
+    next_report = time.monotonic() + args.report_interval
+    while len(aggregator.finished) < args.workers:
+        try:
+            aggregator.add(results.get(timeout=0.5))
+        except queue.Empty:
+            alive = [process for process in processes if process.is_alive()]
+            if not alive or (deadline and time.monotonic() > deadline):
+                break
+        except KeyboardInterrupt:
+            # Ctrl+C отримують і воркери; чекаємо їхні фінальні знімки
+            deadline = time.monotonic() + 10
+            continue
+        if time.monotonic() >= next_report:
+            next_report += args.report_interval
+            logger.info(f"📊 {json.dumps(aggregator.interval_report(), ensure_ascii=False)}")
+    
+    missing = args.workers - len(aggregator.finished)
+    if missing:
+        logger.warning(f"⚠️ {missing} воркерів завершились без фінального знімка, звіт неповний")
+    report = aggregator.final_report()
+    logger.info(f"🏁 {json.dumps(report, ensure_ascii=False)}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"💾 Звіт збережено в {args.report}")
+    for process in processes:
+        process.join(timeout=5)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    if args.workers > 1:
+        run_sharded(args)
+    else:
+        try:
+            asyncio.run(main(args))
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass